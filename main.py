@@ -1,13 +1,19 @@
+import bisect
+import functools
+import itertools
 import os
 import random
+import re
 import sqlite3
-from dataclasses import dataclass
+from pathlib import Path
+from dataclasses import dataclass, field
 from textual.app import App, ComposeResult
 from textual.widgets import Static, Input, Footer
 from textual.containers import Vertical
 from textual.reactive import reactive
 import romkan
 import jaconv
+import numpy as np
 
 try:
     from fugashi import Tagger
@@ -75,15 +81,33 @@ def load_frequency_list(freq_path=None):
         return {}
 
 
-def assign_tier_from_frequency(word, freq_dict):
+def build_tier_classifier(freq_dict):
     """
-    Assign tier based on real-world frequency data.
+    Build a function assigning tiers based on real-world frequency data.
 
     Tier 1: Very common (top 2000 words)
     Tier 2: Common (2001-5000)
     Tier 3: Uncommon (5001+)
+
+    Words are bucketed into sets once so classifying is only membership tests.
     """
-    if word not in freq_dict:
+    # Adjust these thresholds based on your frequency list format
+    # If using rank (1, 2, 3...), lower numbers = more common
+    # If using frequency count, higher numbers = more common
+
+    # Assuming frequency count (higher = more common)
+    tier1_words = frozenset(w for w, f in freq_dict.items() if f >= 1000)  # Very common
+    tier2_words = frozenset(w for w, f in freq_dict.items() if 100 <= f < 1000)  # Common
+    tier3_words = frozenset(freq_dict.keys() - tier1_words - tier2_words)  # Uncommon
+
+    def classify(word):
+        if word in tier1_words:
+            return 1
+        if word in tier2_words:
+            return 2
+        if word in tier3_words:
+            return 3
+
         # Fallback to length-based if not in frequency list
         if len(word) <= 2:
             return 1
@@ -92,77 +116,147 @@ def assign_tier_from_frequency(word, freq_dict):
         else:
             return 3
 
-    freq = freq_dict[word]
+    return classify
 
-    # Adjust these thresholds based on your frequency list format
-    # If using rank (1, 2, 3...), lower numbers = more common
-    # If using frequency count, higher numbers = more common
 
-    # Assuming frequency count (higher = more common)
-    if freq >= 1000:  # Very common
-        return 1
-    elif freq >= 100:  # Common
-        return 2
-    else:  # Uncommon
-        return 3
+def to_float(value, default):
+    """Convert a DB value to float, falling back to a default"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
 
 
 # -----------------------------
 # Japanese utilities
 # -----------------------------
+# Katakana ァ..ヶ sit exactly 0x60 above their hiragana counterparts
+_K2H_TABLE = {c: c - 0x60 for c in range(0x30A1, 0x30F7)}
+_KANJI_RE = re.compile(r"[\u4e00-\u9fff]")
+_JA_RE = re.compile(r"[\u3040-\u309f\u4e00-\u9fff]")
+_HALFWIDTH_KANA_RE = re.compile(r"[\uff66-\uff9f]")
+
+
+def kana_to_hiragana(kana):
+    """Convert katakana to hiragana, normalizing only when halfwidth kana are present"""
+    if _HALFWIDTH_KANA_RE.search(kana):
+        kana = jaconv.normalize(kana)
+    return kana.translate(_K2H_TABLE)
+
+
+@functools.lru_cache(maxsize=4096)
 def romaji_to_hiragana(romaji):
+    # Cached: typing and backspacing revisit the same prefixes
     try:
         hira = romkan.to_hiragana(romaji)
-        return jaconv.normalize(jaconv.kata2hira(hira))
+        return hira.translate(_K2H_TABLE)
     except Exception:
         return ""
 
 
 def contains_kanji(word):
-    return any("\u4e00" <= c <= "\u9fff" for c in word)
+    return bool(_KANJI_RE.search(word))
 
 
 def is_japanese_word(word):
-    return any("\u4e00" <= c <= "\u9fff" for c in word) or any("\u3040" <= c <= "\u309f" for c in word)
+    return bool(_JA_RE.search(word))
+
 
+def get_readings_batch(words, chunk_size=1000):
+    """
+    Get readings for many words with one tagger call per chunk.
 
-def get_readings(word):
-    """Get readings using fugashi/MeCab"""
+    Words are joined with newlines (whitespace to MeCab) and tokens are mapped
+    back to their source word by consuming surface lengths in order.
+    Returns a list of reading lists aligned with `words`.
+    """
     if not FUGASHI_AVAILABLE:
-        return []
-    readings = set()
-    try:
-        for token in tagger(word):
-            if token.feature.kana:
-                readings.add(jaconv.normalize(jaconv.kata2hira(token.feature.kana)))
-    except Exception:
-        pass
-    return list(readings)
+        return [[] for _ in words]
+
+    results = []
+    for start in range(0, len(words), chunk_size):
+        chunk = words[start:start + chunk_size]
+        chunk_readings = [[] for _ in chunk]
+        # MeCab skips whitespace, so it never counts towards token surfaces
+        lengths = [len("".join(w.split())) for w in chunk]
+        try:
+            idx = 0
+            consumed = 0
+            for token in tagger("\n".join(chunk)):
+                while idx < len(chunk) and consumed >= lengths[idx]:
+                    idx += 1
+                    consumed = 0
+                if idx >= len(chunk):
+                    break
+                consumed += len(token.surface)
+                kana = token.feature.kana
+                if kana:
+                    hira = kana_to_hiragana(kana)
+                    if hira not in chunk_readings[idx]:
+                        chunk_readings[idx].append(hira)
+        except Exception:
+            pass
+        results.extend(chunk_readings)
+    return results
 
 
 # -----------------------------
-# JMdict dictionary loader (for meanings)
+# SQLite helpers
 # -----------------------------
-def load_jmdict_dictionary(jmdict_path):
-    """Load JMdict as a lookup dictionary for meanings"""
+# Loaders only ever scan, so skip syncing and give the pager a big cache + mmap
+READONLY_PRAGMAS = """
+    PRAGMA query_only=1;
+    PRAGMA synchronous=OFF;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+"""
+
+
+def readonly_uri(db_path):
+    """SQLite URI opening a database file in read-only mode"""
+    return f"{Path(db_path).resolve().as_uri()}?mode=ro"
+
+
+def connect_readonly(db_path):
+    """Open a SQLite database in read-only mode, tuned for bulk scans"""
+    conn = sqlite3.connect(readonly_uri(db_path), uri=True)
+    conn.executescript(READONLY_PRAGMAS)
+    return conn
+
+
+# -----------------------------
+# JMdict attachment (for meanings)
+# -----------------------------
+# Rows pulled per fetchmany() call when streaming large tables
+FETCH_BATCH_SIZE = 5000
+
+
+def attach_jmdict(cur, jmdict_path):
+    """
+    Attach JMdict to an open connection as schema "jm" so meanings can be joined in SQL.
+
+    Returns (table_name, word_col, meaning_col), or None if JMdict is unusable.
+    """
     if not os.path.exists(jmdict_path):
         print(f"JMdict file not found at {jmdict_path}")
-        return {}
+        return None
 
-    print(f"Loading JMdict dictionary from {jmdict_path}...")
+    print(f"Attaching JMdict dictionary from {jmdict_path}...")
 
     try:
-        conn = sqlite3.connect(jmdict_path)
-        cur = conn.cursor()
+        cur.execute("ATTACH DATABASE ? AS jm", (readonly_uri(jmdict_path),))
+        # cache_size and mmap_size are per schema, so tune the attached one too
+        cur.execute("PRAGMA jm.cache_size=-65536")
+        cur.execute("PRAGMA jm.mmap_size=268435456")
 
         # Try to detect structure
-        tables = cur.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        tables = cur.execute("SELECT name FROM jm.sqlite_master WHERE type='table'").fetchall()
         if not tables:
-            conn.close()
-            return {}
+            return None
 
         table_name = tables[0][0]
-        cols_info = cur.execute(f"PRAGMA table_info({table_name})").fetchall()
+        cols_info = cur.execute(f"PRAGMA jm.table_info({table_name})").fetchall()
         cols = [c[1] for c in cols_info]
 
         # Detect columns
@@ -172,31 +266,33 @@ def load_jmdict_dictionary(jmdict_path):
 
         if not meaning_col:
             print("No meaning column found in JMdict")
-            conn.close()
-            return {}
+            return None
 
-        # Build lookup dictionary
-        sql = f"SELECT {word_col}, {meaning_col} FROM {table_name}"
-        cur.execute(sql)
-
-        meaning_dict = {}
-        for row in cur.fetchall():
-            word, meaning = row
-            if word and meaning:
-                meaning_dict[word.strip()] = meaning.strip()
-
-        conn.close()
-        print(f"Loaded {len(meaning_dict)} meanings from JMdict")
-        return meaning_dict
+        return table_name, word_col, meaning_col
 
     except Exception as e:
         print(f"Could not load JMdict for meanings: {e}")
-        return {}
+        return None
 
 
 # -----------------------------
 # Vocab loaders
 # -----------------------------
+def split_tiers(vocab):
+    """Group vocab entries into one tuple per tier, keeping vocab order"""
+    return {t: tuple(e for e in vocab if e[4] == t) for t in (1, 2, 3)}
+
+
+def make_entry(word, readings, meaning, tier):
+    """
+    Build a vocab entry: (word, readings, readings_norm, meaning, tier).
+
+    readings_norm holds the hiragana forms of all readings so answer checks
+    are a single set lookup.
+    """
+    readings_norm = frozenset(r.strip().translate(_K2H_TABLE) for r in readings)
+    return (word, readings, readings_norm, meaning, tier)
+
 
 def load_kindle_vocab(kindle_path, jmdict_path, freq_dict=None):
     """Load from Kindle vocab.db using fugashi for readings and JMdict for meanings"""
@@ -206,37 +302,49 @@ def load_kindle_vocab(kindle_path, jmdict_path, freq_dict=None):
 
     print(f"\nLoading Kindle vocab from {kindle_path}...")
 
-    conn = sqlite3.connect(kindle_path)
+    conn = connect_readonly(kindle_path)
     cur = conn.cursor()
 
-    cur.execute("""
-        SELECT DISTINCT word
-        FROM WORDS
-        WHERE lang='ja'
-    """)
+    # Look up meanings by joining against JMdict inside SQLite
+    jmdict = attach_jmdict(cur, jmdict_path)
+    if jmdict:
+        table_name, word_col, meaning_col = jmdict
+        # Duplicate JMdict entries: keep the meaning from the last row, as a dict build would
+        cur.execute(f"""
+            SELECT w.word, j.{meaning_col}, MAX(j.rowid)
+            FROM WORDS w
+            LEFT JOIN jm.{table_name} j
+                ON j.{word_col} = w.word AND j.{meaning_col} IS NOT NULL AND j.{meaning_col} != ''
+            WHERE w.lang='ja' AND length(w.word) <= 3
+            GROUP BY w.word
+        """)
+    else:
+        cur.execute("""
+            SELECT DISTINCT word, NULL
+            FROM WORDS
+            WHERE lang='ja' AND length(word) <= 3
+        """)
 
     # Filter: only words with kanji, and max 3 characters for common everyday words
     # Most common Japanese words are 1-3 characters
-    words = [w for (w,) in cur.fetchall() if contains_kanji(w) and len(w) <= 3]
+    words = []
+    meanings = []
+    for row in cur.fetchall():
+        if contains_kanji(row[0]):
+            words.append(row[0])
+            meanings.append(row[1].strip() if row[1] else "No meaning available")
     conn.close()
 
-    # Load JMdict for meanings
-    meaning_dict = load_jmdict_dictionary(jmdict_path)
-
     vocab = []
-    tier_buckets = {1: [], 2: [], 3: []}
+    classify = build_tier_classifier(freq_dict) if freq_dict else None
 
     print(f"Processing {len(words)} words with fugashi...")
 
-    for w in words:
-        readings = get_readings(w)
+    for w, meaning, readings in zip(words, meanings, get_readings_batch(words)):
         if readings:
-            # Try to get meaning from JMdict
-            meaning = meaning_dict.get(w, "No meaning available")
-
             # Assign tier based on frequency list if available
             if freq_dict:
-                tier = assign_tier_from_frequency(w, freq_dict)
+                tier = classify(w)
             else:
                 # Fallback to length-based tiers
                 if len(w) == 1:
@@ -246,15 +354,18 @@ def load_kindle_vocab(kindle_path, jmdict_path, freq_dict=None):
                 else:  # len(w) == 3
                     tier = 2  # Three kanji - less common
 
-            entry = (w, readings, meaning, tier)
-            vocab.append(entry)
-            tier_buckets[tier].append(entry)
+            vocab.append(make_entry(w, readings, meaning, tier))
+
+    # Most frequent words first (higher count = more common)
+    if freq_dict:
+        vocab.sort(key=lambda e: -freq_dict.get(e[0], 0.0))
+    tier_buckets = split_tiers(vocab)
 
     print(f"Successfully loaded {len(vocab)} words with readings")
     if vocab:
         print(f"\nSample entries:")
         for i in range(min(5, len(vocab))):
-            word, readings, meaning, tier = vocab[i]
+            word, readings, _, meaning, tier = vocab[i]
             meaning_short = meaning[:60] + "..." if len(meaning) > 60 else meaning
             print(f"  {word} → {readings[0]} | {meaning_short}")
 
@@ -269,7 +380,7 @@ def load_jmdict_only(jmdict_path, freq_dict=None):
     if not os.path.exists(jmdict_path):
         raise FileNotFoundError(f"JMdict file not found: {jmdict_path}")
 
-    conn = sqlite3.connect(jmdict_path)
+    conn = connect_readonly(jmdict_path)
     cur = conn.cursor()
 
     # Get table name
@@ -302,111 +413,118 @@ def load_jmdict_only(jmdict_path, freq_dict=None):
     else:
         select_cols.append("NULL as reading")
 
-    if meaning_col:
-        select_cols.append(meaning_col)
-    else:
-        select_cols.append("'Meaning not found' as meaning")
-
-    if freq_score_col:
+    if freq_dict:
+        # Tiers come from the external list, the DB frequency is never read
+        select_cols.append("NULL as frequency")
+    elif freq_score_col:
         select_cols.append(freq_score_col)
     elif freq_col:
         select_cols.append(freq_col)
     else:
         select_cols.append("3.0 as frequency")
 
-    sql = f"SELECT {', '.join(select_cols)} FROM {table_name}"
+    # Meaning goes last: it is the widest column and only decoded for kept rows
+    if meaning_col:
+        select_cols.append(meaning_col)
+    else:
+        select_cols.append("'Meaning not found' as meaning")
+
+    # Filter length and missing readings in SQL so rejected rows never reach Python
+    where = [f"length({word_col}) BETWEEN 1 AND 3"]
+    if reading_col:
+        where.append(f"{reading_col} IS NOT NULL AND {reading_col} != ''")
+
+    sql = f"SELECT {', '.join(select_cols)} FROM {table_name} WHERE {' AND '.join(where)}"
+    # Return TEXT as raw bytes so columns of rejected rows are never decoded
+    conn.text_factory = bytes
+    cur.arraysize = FETCH_BATCH_SIZE
     cur.execute(sql)
 
-    vocab = []
-    tier_buckets = {1: [], 2: [], 3: []}
+    # Phase 1: filter rows and collect columns
+    words, readings, meanings, freqs = [], [], [], []
     skipped = 0
 
-    for row in cur.fetchall():
-        word = row[0]
-        if not word or not is_japanese_word(word):
-            skipped += 1
-            continue
-
-        # Skip very long words - focus on common everyday vocabulary (max 3 chars)
-        if len(word) > 3:
-            skipped += 1
-            continue
-
-        # Get reading (index 1)
-        reading_raw = row[1]
-        if reading_raw and isinstance(reading_raw, str) and reading_raw.strip():
-            # Normalize to hiragana
-            reading = [jaconv.kata2hira(reading_raw.strip())]
-        else:
-            # Skip if no reading
-            skipped += 1
-            continue
+    while True:
+        rows = cur.fetchmany()
+        if not rows:
+            break
+        for row in rows:
+            word = row[0].decode("utf-8") if row[0] else ""
+            if not word or not is_japanese_word(word):
+                skipped += 1
+                continue
+
+            # Get reading (index 1)
+            reading_raw = row[1].decode("utf-8").strip() if isinstance(row[1], bytes) else ""
+            if reading_raw:
+                # Normalize to hiragana
+                reading = [reading_raw.translate(_K2H_TABLE)]
+            else:
+                # Skip if no reading
+                skipped += 1
+                continue
 
-        # Get meaning (index 2)
-        meaning = row[2] if len(row) > 2 and row[2] else "Meaning not found"
+            words.append(word)
+            readings.append(reading)
+            # Get frequency (index 2) - could be frequency_score or old frequency
+            freqs.append(row[2] if row[2] else 3.0)
+            # Get meaning (index 3)
+            meanings.append(row[3].decode("utf-8") if row[3] else "Meaning not found")
 
-        # Get frequency (index 3) - could be frequency_score or old frequency
-        freq = row[3] if len(row) > 3 and row[3] else 3.0
+    conn.close()
 
+    # Phase 2: assign tiers for all words at once
+    if freq_dict:
         # Assign tier based on external frequency list if available
-        if freq_dict:
-            tier = assign_tier_from_frequency(word, freq_dict)
-        elif freq_score_col:
-            # Using frequency_score (lower = more common)
-            # Adjust thresholds based on your data
-            try:
-                score = float(freq)
-            except:
-                score = 5000.0
-
-            # Thresholds for frequency_score (sum of kanji ranks)
-            # Single kanji: ~100-2000
-            # Two kanji: ~200-4000
-            # Three kanji: ~300-6000
-            if score <= 800:  # Very common words
-                tier = 1
-            elif score <= 2500:  # Common words
-                tier = 2
-            else:  # Less common words
-                tier = 3
-        else:
-            # Fallback to JMdict frequency + length
-            try:
-                freq_val = float(freq)
-            except:
-                freq_val = 3.0
-
-            # Combine frequency and length for better common word detection
-            if len(word) == 1:
-                tier = 1  # Single character words are almost always common
-            elif len(word) == 2:
-                # 2-char words use frequency
-                if freq_val >= 4.0:
-                    tier = 1
-                elif freq_val >= 2.5:
-                    tier = 1  # Still tier 1, very common
-                else:
-                    tier = 2
-            else:  # len(word) == 3
-                # 3-char words are less common
-                if freq_val >= 4.5:
-                    tier = 1
-                elif freq_val >= 3.0:
-                    tier = 2
-                else:
-                    tier = 3
-
-        entry = (word, reading, meaning, tier)
-        vocab.append(entry)
-        tier_buckets[tier].append(entry)
-
-    conn.close()
+        classify = build_tier_classifier(freq_dict)
+        tiers = [classify(word) for word in words]
+        # Frequency count (higher = more common)
+        ranks = np.fromiter((-freq_dict.get(w, 0.0) for w in words), dtype=np.float64, count=len(words))
+    elif freq_score_col:
+        # Using frequency_score (lower = more common)
+        # Adjust thresholds based on your data
+        scores = np.fromiter((to_float(f, 5000.0) for f in freqs), dtype=np.float64, count=len(freqs))
+
+        # Thresholds for frequency_score (sum of kanji ranks)
+        # Single kanji: ~100-2000
+        # Two kanji: ~200-4000
+        # Three kanji: ~300-6000
+        tiers = np.select(
+            [scores <= 800,  # Very common words
+             scores <= 2500],  # Common words
+            [1, 2],
+            default=3,  # Less common words
+        ).tolist()
+        ranks = scores
+    else:
+        # Fallback to JMdict frequency + length
+        freq_vals = np.fromiter((to_float(f, 3.0) for f in freqs), dtype=np.float64, count=len(freqs))
+        lengths = np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words))
+
+        # Combine frequency and length for better common word detection:
+        # single characters are almost always common, 2-char words use
+        # frequency, 3-char words are less common
+        tiers = np.select(
+            [lengths == 1,
+             (lengths == 2) & (freq_vals >= 2.5),
+             lengths == 2,
+             freq_vals >= 4.5,
+             freq_vals >= 3.0],
+            [1, 1, 2, 1, 2],
+            default=3,
+        ).tolist()
+        ranks = -freq_vals
+
+    # Order vocab from most to least common, then split into tiers once
+    vocab = [make_entry(words[i], readings[i], meanings[i], tiers[i])
+             for i in np.argsort(ranks, kind="stable").tolist()]
+    tier_buckets = split_tiers(vocab)
 
     print(f"Loaded {len(vocab)} words from JMdict (skipped {skipped})")
     if vocab:
         print(f"\nSample entries:")
         for i in range(min(5, len(vocab))):
-            word, readings, meaning, tier = vocab[i]
+            word, readings, _, meaning, tier = vocab[i]
             meaning_short = meaning[:60] + "..." if len(meaning) > 60 else meaning
             print(f"  {word} → {readings[0]} | {meaning_short}")
 
@@ -416,22 +534,22 @@ def load_jmdict_only(jmdict_path, freq_dict=None):
 # -----------------------------
 # Leveling system
 # -----------------------------
+# XP needed per level (exponential growth) and running totals, built once
+MAX_LEVEL = 64
+_LEVEL_XP = [int(50 * (1.5 ** i)) for i in range(MAX_LEVEL)]
+_CUM_XP = list(itertools.accumulate(_LEVEL_XP))
+
+
 def xp_for_level(level):
     """Calculate XP needed for a given level (exponential growth)"""
-    return int(50 * (1.5 ** (level - 1)))
+    return _LEVEL_XP[level - 1]
 
 
 def get_level_from_xp(xp):
-    """Determine current level based on total XP"""
-    level = 1
-    total_xp_needed = 0
-    while True:
-        xp_needed = xp_for_level(level)
-        if total_xp_needed + xp_needed > xp:
-            break
-        total_xp_needed += xp_needed
-        level += 1
-    return level, total_xp_needed
+    """Determine current level and the total XP needed to reach it"""
+    # Clamp so XP past the table stays at MAX_LEVEL instead of overflowing it
+    i = min(bisect.bisect_right(_CUM_XP, xp), MAX_LEVEL - 1)
+    return i + 1, (_CUM_XP[i - 1] if i else 0)
 
 
 def max_tier_for_level(level):
@@ -447,7 +565,7 @@ def max_tier_for_level(level):
 # -----------------------------
 # Game models
 # -----------------------------
-@dataclass
+@dataclass(slots=True)
 class Player:
     x: int
     y: int
@@ -458,42 +576,87 @@ class Player:
     level: int = 1
 
 
-@dataclass
+@dataclass(slots=True)
 class Enemy:
     hp: int
     dmg: int
     xp: int
     tier: int
-    words: list  # list of (surface, readings, meanings, tier)
+    words: tuple  # tuple of (surface, readings, readings_norm, meanings, tier)
+    remaining: list = field(init=False)  # indices into words not yet answered
+
+    def __post_init__(self):
+        self.remaining = list(range(len(self.words)))
 
     def next_word(self):
-        if not self.words:
-            return ("ERROR", ["えらー"], "No meaning available", 1)
-        return random.choice(self.words)
+        """Pick a random unanswered word, returning (entry, slot in remaining)"""
+        if not self.remaining:
+            return make_entry("ERROR", ["えらー"], "No meaning available", 1), None
+        slot = random.randrange(len(self.remaining))
+        return self.words[self.remaining[slot]], slot
+
+    def discard(self, slot):
+        """Remove an answered word from rotation (swap-pop, order doesn't matter)"""
+        self.remaining[slot] = self.remaining[-1]
+        self.remaining.pop()
 
 
 # -----------------------------
 # Map generation
 # -----------------------------
-def generate_map(w=40, h=18):
-    grid = [["#" for _ in range(w)] for _ in range(h)]
-    x, y = w // 2, h // 2
-    # Carve random paths
-    for _ in range(w * h * 3):
-        grid[y][x] = "."
-        dx, dy = random.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
-        x = max(1, min(w - 2, x + dx))
-        y = max(1, min(h - 2, y + dy))
+MAP_WIDTH = 40
+MAP_HEIGHT = 18
+
+# Tiles are stored as ASCII bytes in a flat bytearray indexed by y * w + x
+TILE_WALL = ord("#")
+TILE_FLOOR = ord(".")
+TILE_ENEMY = ord("E")
+TILE_ITEM = ord("!")
+TILE_PLAYER = ord("@")
+
+
+def clamped_walk(start, steps, lo, hi):
+    """
+    Positions of a 1-D walk that is clamped to [lo, hi] after every step.
+
+    The walk is a cumulative sum; each time it leaves the bounds, the
+    overshoot is taken off all later positions, which matches clamping
+    step by step for steps of -1, 0 and 1.
+    """
+    pos = start + np.cumsum(steps)
+    i = 0
+    while True:
+        out = np.flatnonzero((pos[i:] < lo) | (pos[i:] > hi))
+        if not out.size:
+            return pos
+        i += out[0]
+        pos[i:] -= pos[i] - min(max(pos[i], lo), hi)
+
+
+def generate_map(w=MAP_WIDTH, h=MAP_HEIGHT):
+    # Carve random paths: precompute all steps, then walk both axes at once
+    n = w * h * 3
+    dirs = np.random.randint(0, 4, size=n)
+    dx = np.array([1, -1, 0, 0])[dirs]
+    dy = np.array([0, 0, 1, -1])[dirs]
+    # Each position is carved before stepping, so the final step is never carved
+    xs = clamped_walk(w // 2, dx[:-1], 1, w - 2)
+    ys = clamped_walk(h // 2, dy[:-1], 1, h - 2)
+
+    cells = np.full((h, w), TILE_WALL, dtype=np.uint8)
+    cells[h // 2, w // 2] = TILE_FLOOR
+    cells[ys, xs] = TILE_FLOOR
+    grid = bytearray(cells.tobytes())
     # Place enemies
     for _ in range(8):
-        ex, ey = random.randrange(w), random.randrange(h)
-        if grid[ey][ex] == ".":
-            grid[ey][ex] = "E"
+        i = random.randrange(w * h)
+        if grid[i] == TILE_FLOOR:
+            grid[i] = TILE_ENEMY
     # Place healing items
     for _ in range(5):
-        ix, iy = random.randrange(w), random.randrange(h)
-        if grid[iy][ix] == ".":
-            grid[iy][ix] = "!"
+        i = random.randrange(w * h)
+        if grid[i] == TILE_FLOOR:
+            grid[i] = TILE_ITEM
     return grid
 
 
@@ -512,7 +675,7 @@ def create_enemy(tier_buckets, player_level):
     else:
         tier = random.choices([1, 2, 3], weights=[0.75, 0.20, 0.05])[0]  # Mostly tier 1
 
-    words = tier_buckets.get(tier, [])
+    words = tier_buckets.get(tier, ())
     if not words:
         # Fallback to any available tier
         for t in range(max_tier, 0, -1):
@@ -521,7 +684,7 @@ def create_enemy(tier_buckets, player_level):
                 tier = t
                 break
         if not words:
-            words = sum(tier_buckets.values(), [])
+            words = sum(tier_buckets.values(), ())
 
     if not words:
         raise RuntimeError("No words available to create enemy!")
@@ -529,6 +692,7 @@ def create_enemy(tier_buckets, player_level):
     # Give a large pool to each enemy to avoid early repetition
     if len(words) > 25:
         words = random.sample(words, 25)
+    words = tuple(words)
 
     # Reduced HP and damage for easier game
     hp = 2 + tier * 3  # Tier 1=5HP, Tier 2=8HP, Tier 3=11HP
@@ -545,6 +709,7 @@ class KanjiRoguelite(App):
     mode = reactive("overworld")
     current_word = reactive("")
     current_readings = reactive([])
+    current_readings_norm = reactive(frozenset())
     current_meaning = reactive("")
     current_kana = reactive("")
 
@@ -553,6 +718,8 @@ class KanjiRoguelite(App):
         self.vocab = vocab
         self.tier_buckets = tier_buckets
         self.player = None  # Will be created in on_mount
+        self.current_slot = None  # Enemy.remaining slot of the word on screen
+        self.current_romaji = ""  # Last input value seen by on_input_changed
 
     def compose(self) -> ComposeResult:
         with Vertical():
@@ -566,7 +733,7 @@ class KanjiRoguelite(App):
     def on_mount(self):
         # Create player once at the start - BEFORE showing intro
         if self.player is None:
-            self.player = Player(20, 9)
+            self.player = Player(MAP_WIDTH // 2, MAP_HEIGHT // 2)
         self.show_intro()
 
     # -------------------------
@@ -608,21 +775,23 @@ class KanjiRoguelite(App):
     def new_map(self):
         self.map = generate_map()
         # Keep player stats, only reset position
-        self.player.x = 20
-        self.player.y = 9
+        self.player.x = MAP_WIDTH // 2
+        self.player.y = MAP_HEIGHT // 2
         self.refresh_overworld()
         self.update_stats()  # Ensure stats are displayed on new map
 
     def enemies_remaining(self):
-        return any("E" in row for row in self.map)
+        return TILE_ENEMY in self.map
 
     def refresh_overworld(self):
         self.mode = "overworld"
-        out = ""
-        for y, row in enumerate(self.map):
-            for x, ch in enumerate(row):
-                out += "@" if (x, y) == (self.player.x, self.player.y) else ch
-            out += "\n"
+        w = MAP_WIDTH
+        # Draw the player straight into the buffer, render, then restore the tile
+        player_idx = self.player.y * w + self.player.x
+        tile = self.map[player_idx]
+        self.map[player_idx] = TILE_PLAYER
+        out = "".join(self.map[i:i + w].decode() + "\n" for i in range(0, len(self.map), w))
+        self.map[player_idx] = tile
         self.query_one("#map", Static).update(out)
         self.query_one("#kana", Static).update("")
         self.query_one("#feedback", Static).update("")
@@ -665,8 +834,7 @@ class KanjiRoguelite(App):
             inp.focus()
             self.query_one("#feedback", Static).update("")
             if self.enemy and self.enemy.hp > 0:
-                next_word = self.enemy.next_word()
-                self.set_battle_word(next_word)
+                self.set_battle_word(*self.enemy.next_word())
                 self.mode = "battle"
             else:
                 self.enemy = None
@@ -682,17 +850,18 @@ class KanjiRoguelite(App):
             return
         dx, dy = moves[key]
         nx, ny = self.player.x + dx, self.player.y + dy
-        if nx < 0 or nx >= len(self.map[0]) or ny < 0 or ny >= len(self.map):
+        if nx < 0 or nx >= MAP_WIDTH or ny < 0 or ny >= MAP_HEIGHT:
             return
-        tile = self.map[ny][nx]
-        if tile == "#":
+        idx = ny * MAP_WIDTH + nx
+        tile = self.map[idx]
+        if tile == TILE_WALL:
             return
-        if tile == "!":
+        if tile == TILE_ITEM:
             self.player.hp = min(self.player.max_hp, self.player.hp + 10)
-            self.map[ny][nx] = "."
+            self.map[idx] = TILE_FLOOR
             self.update_stats()  # Update stats after healing
-        if tile == "E":
-            self.map[ny][nx] = "."
+        if tile == TILE_ENEMY:
+            self.map[idx] = TILE_FLOOR
             self.start_battle()
             return
         self.player.x, self.player.y = nx, ny
@@ -706,11 +875,14 @@ class KanjiRoguelite(App):
         self.player.streak = 0
         level, _ = get_level_from_xp(self.player.xp)
         self.enemy = create_enemy(self.tier_buckets, level)
-        self.set_battle_word(self.enemy.next_word())
+        self.set_battle_word(*self.enemy.next_word())
 
-    def set_battle_word(self, word_entry):
-        self.current_word, self.current_readings, self.current_meaning, _ = word_entry
+    def set_battle_word(self, word_entry, slot=None):
+        self.current_slot = slot
+        (self.current_word, self.current_readings, self.current_readings_norm,
+         self.current_meaning, _) = word_entry
         self.current_kana = ""
+        self.current_romaji = ""
         self.query_one("#map", Static).update(f"\n\n   {self.current_word}   \n\nE HP: {self.enemy.hp}")
         self.query_one("#kana", Static).update("→ ")
         self.query_one("#feedback", Static).update("")
@@ -721,25 +893,34 @@ class KanjiRoguelite(App):
     def on_input_changed(self, event):
         if self.mode != "battle":
             return
-        self.current_kana = romaji_to_hiragana(event.value)
+        value = event.value
+        prev, self.current_romaji = self.current_romaji, value
+        # A single ASCII romaji consonant typed at the end only starts a
+        # syllable, so skip the conversion and redraw until it can resolve
+        # (doubled consonants become っ, so those still update)
+        if (len(value) == len(prev) + 1 and value.startswith(prev)
+                and value[-1].lower() in "bcdfghjklmpqrstvwxyz"
+                and value[-2:-1].lower() != value[-1].lower()):
+            return
+        self.current_kana = romaji_to_hiragana(value)
         self.query_one("#kana", Static).update(f"→ {self.current_kana}")
 
     def on_input_submitted(self, event):
         if self.mode != "battle":
             return
 
-        # Normalize input to hiragana
-        user_input = jaconv.kata2hira(self.current_kana.strip())
+        # Convert the full buffer, as the last keystroke may have been skipped
+        self.current_kana = romaji_to_hiragana(event.value)
 
-        # Normalize all correct readings to hiragana
-        correct_readings_normalized = [jaconv.kata2hira(r.strip()) for r in self.current_readings]
+        # Normalize input to hiragana
+        user_input = self.current_kana.strip().translate(_K2H_TABLE)
 
         # Get display values
         correct_reading = self.current_readings[0] if self.current_readings else self.current_word
         meaning = self.current_meaning if self.current_meaning else "Meaning not found"
 
-        # Check if correct
-        is_correct = user_input in correct_readings_normalized
+        # Check if correct (readings were normalized at load time)
+        is_correct = user_input in self.current_readings_norm
 
         # Store old level to detect level up
         old_level, _ = get_level_from_xp(self.player.xp)
@@ -750,10 +931,8 @@ class KanjiRoguelite(App):
             self.player.streak += 1
             feedback_text = f"✓ Correct! Meaning: {meaning}"
             # Remove the word from enemy rotation to avoid repetition
-            self.enemy.words = [w for w in self.enemy.words
-                                if not (w[0] == self.current_word and
-                                        w[1] == self.current_readings and
-                                        w[2] == self.current_meaning)]
+            if self.current_slot is not None:
+                self.enemy.discard(self.current_slot)
         else:
             self.player.hp -= self.enemy.dmg
             self.player.streak = 0